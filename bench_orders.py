@@ -0,0 +1,93 @@
+"""
+Compare the dict-of-models order store with ColumnarOrderStore.
+
+Reports memory per order, time to build the store, time to list every order
+as models (what GET /orders does) and time to scan for pending orders and
+their revenue.
+
+Usage: python bench_orders.py [--orders 1000000]
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from uuid import uuid4
+
+from lang_graph_db import Order, OrderItem, menu_items, pricing, set_order_items
+from order_store import ColumnarOrderStore
+
+STATUSES = ["pending", "preparing", "ready", "delivered", "cancelled"]
+CUSTOMERS = [f"Customer {i}" for i in range(5000)]
+
+
+def make_orders(count: int):
+    rng = random.Random(42)
+    menu_ids = list(menu_items)
+    for _ in range(count):
+        items = [OrderItem(menu_item_id=rng.choice(menu_ids), quantity=rng.randint(1, 4))
+                 for _ in range(rng.randint(1, 4))]
+        order = Order(id=str(uuid4()), items=[], customer_name=rng.choice(CUSTOMERS),
+                      total=0, status=rng.choice(STATUSES))
+        set_order_items(order, items, pricing.total_cents(items))
+        yield order
+
+
+def build(store, count: int):
+    for order in make_orders(count):
+        store[order.id] = order
+    return store
+
+
+def measure_bytes(new_store, count: int) -> float:
+    """Memory held by a store after inserting `count` orders, per order."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = build(new_store(), count)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del store
+    return (after - before) / count
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def scan_dict(store):
+    pending = [order for order in store.values() if order.status == "pending"]
+    return len(pending), sum(order._total_cents for order in pending)
+
+
+def scan_columnar(store):
+    return store.count_status("pending"), store.revenue_cents("pending")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    stores = {
+        "dict": (dict, scan_dict),
+        "columnar": (lambda: ColumnarOrderStore(Order, OrderItem), scan_columnar),
+    }
+    print(f"{args.orders:,} orders")
+    print(f"{'store':<10} {'bytes/order':>12} {'build s':>9} {'list s':>9} {'scan s':>9}  pending / revenue")
+    for name, (new_store, scan) in stores.items():
+        bytes_per_order = measure_bytes(new_store, args.orders)
+        build_time, store = timed(lambda: build(new_store(), args.orders))
+        list_time, _ = timed(lambda: list(store.values()))
+        scan_time, (pending, revenue) = timed(lambda: scan(store))
+        print(f"{name:<10} {bytes_per_order:>12.0f} {build_time:>9.2f} {list_time:>9.2f} {scan_time:>9.3f}  "
+              f"{pending:,} / {revenue / 100:,.2f}")
+        del store
+        gc.collect()
+
+
+if __name__ == "__main__":
+    main()
@@ -55,6 +55,17 @@ def get_all_orders():
     response = requests.get(url)
     return response.json()
 
+@tool
+def get_order_stats():
+    """
+    Fetch order statistics: order counts by status, total revenue, today's revenue,
+    revenue by status and quantities sold per menu item including the top-selling item.
+    Use this instead of get_all_orders to answer counting and revenue questions.
+    """
+    url = "http://127.0.0.1:8000/orders/stats"
+    response = requests.get(url)
+    return response.json()
+
 @tool
 def get_order_details(order_id: str):
     """Fetch details of a specific order by ID."""
@@ -67,7 +78,8 @@ def get_order_details(order_id: str):
 @tool
 def update_order(order_id: str, order_items: list, customer_name: str):
     """
-    Update an existing order.
+    Update an existing order by replacing all of its items.
+    To add, remove or change a few items use edit_order_items instead.
     Format: {"items": [{"menu_item_id": "1", "quantity": 2}], "customer_name": "John"}
     """
     url = f"http://127.0.0.1:8000/orders/{order_id}"
@@ -77,6 +89,23 @@ def update_order(order_id: str, order_items: list, customer_name: str):
         return f"Order with ID {order_id} not found."
     return response.json()
 
+@tool
+def edit_order_items(order_id: str, item_changes: list):
+    """
+    Change some items of an existing order without resending the whole order.
+    Each change has an op: "add" (quantity defaults to 1), "remove" (omit quantity to remove the item entirely)
+    or "set" (set the exact quantity, 0 removes the item).
+    Format: [{"menu_item_id": "2", "op": "add", "quantity": 1}, {"menu_item_id": "1", "op": "remove"}]
+    """
+    url = f"http://127.0.0.1:8000/orders/{order_id}/items"
+    payload = {"items": item_changes}
+    response = requests.patch(url, json=payload)
+    if response.status_code == 404:
+        return f"Order with ID {order_id} not found."
+    if response.status_code == 400:
+        return response.json()["detail"]
+    return response.json()
+
 @tool
 def delete_order(order_id: str):
     """Delete an order by ID."""
@@ -129,8 +158,10 @@ tools = [
     get_menu_item,
     place_order, 
     get_all_orders,
+    get_order_stats,
     get_order_details,
     update_order,
+    edit_order_items,
     delete_order,
     update_order_status
 ]
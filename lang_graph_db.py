@@ -1,10 +1,19 @@
+import os
+from datetime import date, datetime
 from fastapi import FastAPI, HTTPException, APIRouter
-from pydantic import BaseModel
-from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Dict, List, Literal, MutableMapping, Optional
 from uuid import uuid4
+from order_stats import OrderStatsTracker
+from order_store import ColumnarOrderStore
+from pricing import PricingEngine
+from profiling import install_profiling
 
 app = FastAPI(title="Restaurant API")
 
+# Largest quantity of one menu item in an order
+MAX_ITEM_QUANTITY = 10_000
+
 # Models
 class MenuItem(BaseModel):
     id: str
@@ -14,18 +23,49 @@ class MenuItem(BaseModel):
 
 class OrderItem(BaseModel):
     menu_item_id: str
-    quantity: int
+    quantity: int = Field(ge=0, le=MAX_ITEM_QUANTITY)
 
 class OrderCreate(BaseModel):
     items: List[OrderItem]
     customer_name: str
 
+class OrderItemDelta(BaseModel):
+    menu_item_id: str
+    op: Literal["add", "remove", "set"]
+    # add: defaults to 1, remove: omit to drop the item entirely, set: required (0 drops the item)
+    quantity: Optional[int] = Field(default=None, ge=0, le=MAX_ITEM_QUANTITY)
+
+class OrderPatch(BaseModel):
+    items: List[OrderItemDelta]
+    customer_name: Optional[str] = None
+
 class Order(BaseModel):
     id: str
     items: List[OrderItem]
     customer_name: str
     total: float
     status: str = "pending"
+    created_at: datetime = Field(default_factory=datetime.now)
+    # Exact total and the menu version it was priced with, used for incremental re-pricing
+    _total_cents: int = PrivateAttr(default=0)
+    _menu_version: int = PrivateAttr(default=0)
+
+class ItemSales(BaseModel):
+    menu_item_id: str
+    name: str
+    quantity: int
+
+class OrderStats(BaseModel):
+    total_orders: int
+    orders_by_status: Dict[str, int]
+    # Revenue figures leave out cancelled orders, so revenue_by_status["cancelled"] is always 0
+    revenue: float
+    revenue_today: float
+    revenue_by_status: Dict[str, float]
+    top_selling_item: Optional[ItemSales] = None
+    item_sales: List[ItemSales]
+
+ORDER_STATUSES = ["pending", "preparing", "ready", "delivered", "cancelled"]
 
 # In-memory storage
 menu_items = {
@@ -36,7 +76,36 @@ menu_items = {
     "5": MenuItem(id="5", name="Tiramisu", description="Italian coffee-flavored dessert", price=6.99),
 }
 
-orders: Dict[str, Order] = {}
+# ORDER_STORE=columnar keeps orders in compact arrays instead of one model per order.
+# Orders read from it are copies, so endpoints always assign a changed order back.
+if os.getenv("ORDER_STORE") == "columnar":
+    orders: MutableMapping[str, Order] = ColumnarOrderStore(Order, OrderItem)
+else:
+    orders: MutableMapping[str, Order] = {}
+
+# Running totals behind /orders/stats; every change to `orders` must also go through it
+order_stats = OrderStatsTracker()
+
+# Price table in cents; call pricing.load_menu(menu_items) after changing menu prices
+pricing = PricingEngine(menu_items)
+
+def validate_items(items):
+    for item in items:
+        if item.menu_item_id not in pricing:
+            raise HTTPException(status_code=400, detail=f"Menu item with id {item.menu_item_id} not found")
+
+def set_order_items(order: Order, items: List[OrderItem], total_cents: int):
+    order.items = items
+    order.total = total_cents / 100
+    order._total_cents = total_cents
+    order._menu_version = pricing.version
+
+def replace_order(order_id: str, old_order: Order, order: Order):
+    """Store an updated order, then move its stats from the old state to the new one."""
+    # Write first: if the store rejects the order, the stats still match what is stored
+    orders[order_id] = order
+    order_stats.remove(old_order)
+    order_stats.add(order)
 
 # Routers
 menu_router = APIRouter(prefix="/menu", tags=["menu"])
@@ -56,33 +125,47 @@ async def get_menu_item(item_id: str):
 # Order endpoints
 @order_router.post("/", response_model=Order)
 async def create_order(order_data: OrderCreate):
-    # Validate all menu items exist
-    for item in order_data.items:
-        if item.menu_item_id not in menu_items:
-            raise HTTPException(status_code=400, detail=f"Menu item with id {item.menu_item_id} not found")
-    
-    # Calculate total
-    total = 0
-    for item in order_data.items:
-        menu_item = menu_items[item.menu_item_id]
-        total += menu_item.price * item.quantity
+    validate_items(order_data.items)
     
     # Create order
     order_id = str(uuid4())
     new_order = Order(
         id=order_id,
-        items=order_data.items,
+        items=[],
         customer_name=order_data.customer_name,
-        total=round(total, 2)
+        total=0
     )
+    set_order_items(new_order, order_data.items, pricing.total_cents(order_data.items))
     
+    # Stats are updated only once the store has accepted the order
     orders[order_id] = new_order
+    order_stats.add(new_order)
     return new_order
 
 @order_router.get("/", response_model=List[Order])
 async def get_orders():
     return list(orders.values())
 
+@order_router.get("/stats", response_model=OrderStats)
+async def get_order_stats():
+    """Order counts, revenue and item sales, maintained as orders change."""
+    item_sales = sorted(
+        (ItemSales(menu_item_id=item_id, name=menu_items[item_id].name, quantity=quantity)
+         for item_id, quantity in order_stats.item_quantities.items() if quantity > 0),
+        key=lambda sales: sales.quantity,
+        reverse=True
+    )
+    revenue_cents = sum(order_stats.revenue_cents_by_status.values())
+    return OrderStats(
+        total_orders=len(orders),
+        orders_by_status={status: order_stats.counts_by_status[status] for status in ORDER_STATUSES},
+        revenue=revenue_cents / 100,
+        revenue_today=order_stats.revenue_cents_by_day[date.today()] / 100,
+        revenue_by_status={status: order_stats.revenue_cents_by_status[status] / 100 for status in ORDER_STATUSES},
+        top_selling_item=item_sales[0] if item_sales else None,
+        item_sales=item_sales
+    )
+
 @order_router.get("/{order_id}", response_model=Order)
 async def get_order(order_id: str):
     if order_id not in orders:
@@ -94,30 +177,80 @@ async def update_order(order_id: str, order_data: OrderCreate):
     if order_id not in orders:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    # Validate all menu items exist
-    for item in order_data.items:
-        if item.menu_item_id not in menu_items:
-            raise HTTPException(status_code=400, detail=f"Menu item with id {item.menu_item_id} not found")
+    validate_items(order_data.items)
+    
+    # Update a copy so the stored order keeps its old state until it is replaced
+    old_order = orders[order_id]
+    order = old_order.model_copy(deep=True)
+    set_order_items(order, order_data.items, pricing.total_cents(order_data.items))
+    order.customer_name = order_data.customer_name
+    replace_order(order_id, old_order, order)
+    
+    return order
+
+@order_router.patch("/{order_id}/items", response_model=Order)
+async def patch_order_items(order_id: str, patch: OrderPatch):
+    """Apply item deltas to an order and adjust its total by the changed lines only."""
+    if order_id not in orders:
+        raise HTTPException(status_code=404, detail="Order not found")
+    validate_items(patch.items)
+    old_order = orders[order_id]
     
-    # Calculate total
-    total = 0
-    for item in order_data.items:
-        menu_item = menu_items[item.menu_item_id]
-        total += menu_item.price * item.quantity
+    # Current quantity per menu item, keeping the order items were first added in
+    quantities: Dict[str, int] = {}
+    for item in old_order.items:
+        quantities[item.menu_item_id] = quantities.get(item.menu_item_id, 0) + item.quantity
     
-    # Update order
-    orders[order_id].items = order_data.items
-    orders[order_id].customer_name = order_data.customer_name
-    orders[order_id].total = round(total, 2)
+    # Apply deltas to a copy so a rejected delta leaves the order untouched
+    total_cents = old_order._total_cents
+    for delta in patch.items:
+        old_quantity = quantities.get(delta.menu_item_id, 0)
+        if delta.op == "add":
+            new_quantity = old_quantity + (1 if delta.quantity is None else delta.quantity)
+        elif delta.op == "remove":
+            if old_quantity == 0:
+                raise HTTPException(status_code=400, detail=f"Menu item with id {delta.menu_item_id} is not in the order")
+            new_quantity = 0 if delta.quantity is None else old_quantity - delta.quantity
+            if new_quantity < 0:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Cannot remove {delta.quantity} of menu item {delta.menu_item_id}, the order has {old_quantity}"
+                )
+        else:
+            if delta.quantity is None:
+                raise HTTPException(status_code=400, detail="Quantity is required for the set operation")
+            new_quantity = delta.quantity
+        total_cents += pricing.delta_cents(delta.menu_item_id, old_quantity, new_quantity)
+        quantities[delta.menu_item_id] = new_quantity
     
-    return orders[order_id]
+    for item_id, quantity in quantities.items():
+        if quantity > MAX_ITEM_QUANTITY:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Menu item {item_id} would have quantity {quantity}, the maximum is {MAX_ITEM_QUANTITY}"
+            )
+    
+    items = [OrderItem(menu_item_id=item_id, quantity=quantity) for item_id, quantity in quantities.items() if quantity > 0]
+    # Prices changed since the order was last priced, so the running total is stale
+    if old_order._menu_version != pricing.version:
+        total_cents = pricing.total_cents(items)
+    
+    order = old_order.model_copy(deep=True)
+    set_order_items(order, items, total_cents)
+    if patch.customer_name is not None:
+        order.customer_name = patch.customer_name
+    replace_order(order_id, old_order, order)
+    
+    return order
 
 @order_router.delete("/{order_id}")
 async def delete_order(order_id: str):
     if order_id not in orders:
         raise HTTPException(status_code=404, detail="Order not found")
     
+    order = orders[order_id]
     del orders[order_id]
+    order_stats.remove(order)
     return {"message": "Order deleted successfully"}
 
 @order_router.patch("/{order_id}/status")
@@ -125,17 +258,22 @@ async def update_order_status(order_id: str, status: str):
     if order_id not in orders:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    valid_statuses = ["pending", "preparing", "ready", "delivered", "cancelled"]
-    if status not in valid_statuses:
-        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of {valid_statuses}")
+    if status not in ORDER_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of {ORDER_STATUSES}")
     
-    orders[order_id].status = status
+    old_order = orders[order_id]
+    order = old_order.model_copy(deep=True)
+    order.status = status
+    replace_order(order_id, old_order, order)
     return {"message": f"Order status updated to {status}"}
 
 # Register routers
 app.include_router(menu_router)
 app.include_router(order_router)
 
+# Opt-in request profiling (PROFILING_ENABLED)
+install_profiling(app)
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from chatbot import chatbot_response
 from routes import router
+from profiling import install_profiling
 
 app = FastAPI()
 
@@ -17,6 +18,9 @@ app.add_middleware(
 # Include routes from routes.py
 app.include_router(router)
 
+# Opt-in request profiling (PROFILING_ENABLED)
+install_profiling(app)
+
 @app.get("/chatbot/")
 async def chatbot(query: str):
     response = chatbot_response(query)
@@ -0,0 +1,36 @@
+from collections import Counter
+
+CANCELLED = "cancelled"
+
+
+class OrderStatsTracker:
+    """
+    Running order statistics, kept up to date as orders change instead of
+    being recomputed from the full order list. Callers remove an order before
+    changing it and add it back afterwards, so each change costs O(items in
+    the order) however many orders exist.
+
+    Cancelled orders are counted by status but left out of revenue and item
+    quantities.
+    """
+
+    def __init__(self):
+        self.counts_by_status: Counter = Counter()
+        self.revenue_cents_by_status: Counter = Counter()
+        self.revenue_cents_by_day: Counter = Counter()
+        self.item_quantities: Counter = Counter()
+
+    def add(self, order):
+        self._apply(order, 1)
+
+    def remove(self, order):
+        self._apply(order, -1)
+
+    def _apply(self, order, sign: int):
+        self.counts_by_status[order.status] += sign
+        if order.status == CANCELLED:
+            return
+        self.revenue_cents_by_status[order.status] += sign * order._total_cents
+        self.revenue_cents_by_day[order.created_at.date()] += sign * order._total_cents
+        for item in order.items:
+            self.item_quantities[item.menu_item_id] += sign * item.quantity
@@ -0,0 +1,193 @@
+from array import array
+from datetime import datetime
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Status code of deleted rows, never handed out by the status table
+DELETED = 255
+
+
+class InternTable:
+    """Maps repeated strings to small integer codes and back."""
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        for value in values:
+            self.intern(value)
+
+    def intern(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+
+class ColumnarOrderStore(MutableMapping):
+    """
+    Order store keeping one row per order in parallel arrays instead of one
+    Pydantic model per order. Customer names, statuses and menu item ids are
+    interned, and item lines live in two packed arrays that each order points
+    into with a start offset and a line count.
+
+    Orders are built as models only when read, so a changed order must be
+    assigned back (`store[order_id] = order`) for the change to be kept.
+    """
+
+    def __init__(self, order_cls, item_cls, statuses: Iterable[str] = ()):
+        self._order_cls = order_cls
+        self._item_cls = item_cls
+        self._rows: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._names = InternTable()
+        self._statuses = InternTable(statuses)
+        self._menu_ids = InternTable()
+
+        # One entry per row
+        self._customer = array("I")
+        self._status = array("B")
+        self._total_cents = array("q")
+        self._menu_version = array("I")
+        self._created_at = array("d")
+        self._line_start = array("Q")
+        self._line_count = array("I")
+
+        # One entry per item line
+        self._line_item = array("H")
+        self._line_quantity = array("i")
+        self._dead_lines = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, order_id) -> bool:
+        return order_id in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return (order_id for order_id in self._ids if order_id is not None)
+
+    def __getitem__(self, order_id: str):
+        return self._materialize(self._rows[order_id])
+
+    def __setitem__(self, order_id: str, order):
+        # Encode every value first, so one that does not fit its column
+        # raises before the store has changed
+        values = (
+            array("I", [self._names.intern(order.customer_name)]),
+            array("B", [self._statuses.intern(order.status)]),
+            array("q", [order._total_cents]),
+            array("I", [order._menu_version]),
+            array("d", [order.created_at.timestamp()]),
+        )
+        line_item = array("H", (self._menu_ids.intern(item.menu_item_id) for item in order.items))
+        line_quantity = array("i", (item.quantity for item in order.items))
+
+        columns = (self._customer, self._status, self._total_cents, self._menu_version, self._created_at)
+        row = self._rows.get(order_id)
+        if row is None:
+            row = len(self._ids)
+            self._rows[order_id] = row
+            self._ids.append(order_id)
+            for column, value in zip(columns, values):
+                column.extend(value)
+            self._line_start.append(0)
+            self._line_count.append(0)
+        else:
+            for column, value in zip(columns, values):
+                column[row] = value[0]
+        self._write_lines(row, line_item, line_quantity)
+
+    def __delitem__(self, order_id: str):
+        row = self._rows.pop(order_id)
+        self._ids[row] = None
+        self._status[row] = DELETED
+        self._total_cents[row] = 0
+        self._dead_lines += self._line_count[row]
+        self._line_count[row] = 0
+        self._maybe_compact()
+
+    def _write_lines(self, row: int, line_item: array, line_quantity: array):
+        old_count = self._line_count[row]
+        new_count = len(line_item)
+        # Reuse the row's current lines when the new items fit, otherwise append
+        if new_count <= old_count:
+            start = self._line_start[row]
+            self._line_item[start:start + new_count] = line_item
+            self._line_quantity[start:start + new_count] = line_quantity
+            self._dead_lines += old_count - new_count
+        else:
+            self._line_start[row] = len(self._line_item)
+            self._line_item.extend(line_item)
+            self._line_quantity.extend(line_quantity)
+            self._dead_lines += old_count
+        self._line_count[row] = new_count
+        self._maybe_compact()
+
+    def _materialize(self, row: int):
+        start = self._line_start[row]
+        end = start + self._line_count[row]
+        menu_ids = self._menu_ids.values
+        items = [
+            self._item_cls.model_construct(menu_item_id=menu_ids[code], quantity=quantity)
+            for code, quantity in zip(self._line_item[start:end], self._line_quantity[start:end])
+        ]
+        # Rows were validated when stored, so skip validation on the way out
+        order = self._order_cls.model_construct(
+            id=self._ids[row],
+            items=items,
+            customer_name=self._names.values[self._customer[row]],
+            total=self._total_cents[row] / 100,
+            status=self._statuses.values[self._status[row]],
+            created_at=datetime.fromtimestamp(self._created_at[row]),
+        )
+        order._total_cents = self._total_cents[row]
+        order._menu_version = self._menu_version[row]
+        return order
+
+    def _maybe_compact(self):
+        """Rebuild the arrays once deleted rows or replaced lines outweigh the live data."""
+        live_lines = len(self._line_item) - self._dead_lines
+        dead_rows = len(self._ids) - len(self._rows)
+        if (self._dead_lines > 1024 and self._dead_lines > live_lines) or (dead_rows > 1024 and dead_rows > len(self._rows)):
+            self._compact()
+
+    def _compact(self):
+        rows = [self._rows[order_id] for order_id in self]
+        ids = [self._ids[row] for row in rows]
+        line_item = array("H")
+        line_quantity = array("i")
+        line_start = array("Q")
+        for row in rows:
+            start = self._line_start[row]
+            end = start + self._line_count[row]
+            line_start.append(len(line_item))
+            line_item.extend(self._line_item[start:end])
+            line_quantity.extend(self._line_quantity[start:end])
+
+        self._customer = array("I", (self._customer[row] for row in rows))
+        self._status = array("B", (self._status[row] for row in rows))
+        self._total_cents = array("q", (self._total_cents[row] for row in rows))
+        self._menu_version = array("I", (self._menu_version[row] for row in rows))
+        self._created_at = array("d", (self._created_at[row] for row in rows))
+        self._line_count = array("I", (self._line_count[row] for row in rows))
+        self._line_start = line_start
+        self._line_item = line_item
+        self._line_quantity = line_quantity
+        self._ids = ids
+        self._rows = {order_id: row for row, order_id in enumerate(ids)}
+        self._dead_lines = 0
+
+    # Scans over the columns, without building any models
+    def count_status(self, status: str) -> int:
+        code = self._statuses.codes.get(status)
+        return 0 if code is None else self._status.count(code)
+
+    def revenue_cents(self, status: Optional[str] = None) -> int:
+        if status is None:
+            return sum(self._total_cents)
+        code = self._statuses.codes.get(status)
+        if code is None:
+            return 0
+        return sum(total for total, row_status in zip(self._total_cents, self._status) if row_status == code)
@@ -0,0 +1,44 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, Protocol
+
+
+class PricedItem(Protocol):
+    """Anything with a price, such as a MenuItem."""
+    price: float
+
+
+def to_cents(price: float) -> int:
+    """Convert a menu price to integer cents without float rounding drift."""
+    return int((Decimal(str(price)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+class PricingEngine:
+    """
+    Precomputed price table in integer cents, shared by every order endpoint.
+    Each call to load_menu() bumps `version`, so an order priced against an
+    older menu can be detected and repriced in full instead of incrementally.
+    """
+
+    def __init__(self, menu: Dict[str, PricedItem]):
+        self.version = 0
+        self._prices: Dict[str, int] = {}
+        self.load_menu(menu)
+
+    def load_menu(self, menu: Dict[str, PricedItem]):
+        """Rebuild the price table. Call whenever menu prices change."""
+        self._prices = {item_id: to_cents(item.price) for item_id, item in menu.items()}
+        self.version += 1
+
+    def __contains__(self, menu_item_id: str) -> bool:
+        return menu_item_id in self._prices
+
+    def price_cents(self, menu_item_id: str) -> int:
+        return self._prices[menu_item_id]
+
+    def total_cents(self, items: Iterable) -> int:
+        """Full total of a list of order items."""
+        return sum(self._prices[item.menu_item_id] * item.quantity for item in items)
+
+    def delta_cents(self, menu_item_id: str, old_quantity: int, new_quantity: int) -> int:
+        """Change in total when one menu item's quantity goes from old to new."""
+        return self._prices[menu_item_id] * (new_quantity - old_quantity)
@@ -0,0 +1,237 @@
+"""
+Opt-in request profiling for the FastAPI apps.
+
+Environment variables:
+    PROFILING_ENABLED    Install the middleware and admin endpoints ("1", "true" or "yes").
+    PROFILE_TOKEN        Shared secret. A request is profiled on demand only when its
+                         X-Profile header equals this token, and the /admin/profiles
+                         endpoints require it in the X-Profile-Token header. When unset,
+                         on-demand profiling and the admin endpoints are disabled.
+    PROFILE_SAMPLE_RATE  Fraction of requests profiled at random, 0.0 - 1.0 (default 0).
+    PROFILE_BUFFER_SIZE  Number of profiles kept in memory (default 20).
+    PROFILE_INTERVAL_MS  Time between stack samples in milliseconds (default 5).
+"""
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from dotenv import load_dotenv
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+load_dotenv()
+
+# Profiling is off unless explicitly enabled for the deployment
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "").lower() in ("1", "true", "yes")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # Fraction of requests, 0.0 - 1.0
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "20"))  # Number of profiles kept in memory
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))  # Time between stack samples
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")  # Shared secret for the X-Profile header and admin endpoints
+
+PROFILE_HEADER = b"x-profile"
+ADMIN_PREFIX = "/admin/profiles"
+SAMPLER_THREAD_NAME = "profile-sampler"
+
+
+def token_matches(value: Optional[str]) -> bool:
+    """Constant-time check of a client-supplied value against PROFILE_TOKEN; always False when no token is set."""
+    if not PROFILE_TOKEN or not value:
+        return False
+    return hmac.compare_digest(value.encode(), PROFILE_TOKEN.encode())
+
+
+class ProfileInfo(BaseModel):
+    id: str
+    method: str
+    path: str
+    status_code: Optional[int] = None
+    started_at: float
+    duration_ms: float
+    samples: int
+
+
+class StackSampler:
+    """
+    Samples the stacks of every thread at a fixed interval while running.
+    Stacks are stored collapsed ("root;caller;callee") with a hit count, so
+    time spent in the LLM call, the loopback HTTP requests, validation or the
+    database shows up as the frames it was spent in. Other requests running
+    at the same time are sampled too.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=SAMPLER_THREAD_NAME, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                name = names.get(ident, str(ident))
+                if name.startswith(SAMPLER_THREAD_NAME):
+                    continue
+                self.stacks[collapse_stack(frame, name)] += 1
+            self.samples += 1
+
+
+def collapse_stack(frame, thread_name: str) -> str:
+    """Render a frame and its callers as a single collapsed-stack line, outermost first."""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        name = getattr(code, "co_qualname", code.co_name)
+        filename = os.path.basename(code.co_filename)
+        frames.append(f"{name} ({filename}:{code.co_firstlineno})".replace(";", ":"))
+        frame = frame.f_back
+    frames.append(thread_name.replace(";", ":"))
+    return ";".join(reversed(frames))
+
+
+class ProfileBuffer:
+    """Ring buffer holding the most recent profiles; the oldest is dropped when full."""
+
+    def __init__(self, size: int):
+        self._profiles: Deque[Tuple[ProfileInfo, Counter]] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, info: ProfileInfo, stacks: Counter):
+        with self._lock:
+            self._profiles.append((info, stacks))
+
+    def list(self) -> List[ProfileInfo]:
+        with self._lock:
+            return [info for info, _ in self._profiles]
+
+    def get(self, profile_id: str) -> Optional[Counter]:
+        with self._lock:
+            for info, stacks in self._profiles:
+                if info.id == profile_id:
+                    return stacks
+        return None
+
+    def merged(self) -> Counter:
+        merged: Counter = Counter()
+        with self._lock:
+            for _, stacks in self._profiles:
+                merged.update(stacks)
+        return merged
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+def render_collapsed(stacks: Dict[str, int]) -> str:
+    """Format stacks as "frame;frame;frame count" lines, the input format of flamegraph.pl and speedscope."""
+    return "".join(f"{stack} {hits}\n" for stack, hits in sorted(stacks.items()))
+
+
+profiles = ProfileBuffer(PROFILE_BUFFER_SIZE)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles a request when its X-Profile header carries
+    PROFILE_TOKEN or it is picked at random with probability `sample_rate`.
+    """
+
+    def __init__(self, app, buffer: ProfileBuffer = profiles,
+                 sample_rate: float = PROFILE_SAMPLE_RATE, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.app = app
+        self.buffer = buffer
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+
+    def _should_profile(self, scope) -> bool:
+        if scope["path"].startswith(ADMIN_PREFIX):
+            return False
+        for key, value in scope["headers"]:
+            if key == PROFILE_HEADER and token_matches(value.decode("latin-1")):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status_code = None
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        sampler = StackSampler(self.interval)
+        started_at = time.time()
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            sampler.stop()
+            info = ProfileInfo(
+                id=str(uuid4()),
+                method=scope["method"],
+                path=scope["path"],
+                status_code=status_code,
+                started_at=started_at,
+                duration_ms=round((time.perf_counter() - start) * 1000, 2),
+                samples=sampler.samples,
+            )
+            self.buffer.add(info, sampler.stacks)
+
+
+# Admin endpoints
+async def require_profile_token(x_profile_token: Optional[str] = Header(default=None)):
+    if not token_matches(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid or missing profile token")
+
+profile_router = APIRouter(prefix=ADMIN_PREFIX, tags=["admin"], dependencies=[Depends(require_profile_token)])
+
+@profile_router.get("/", response_model=List[ProfileInfo])
+async def list_profiles():
+    return profiles.list()
+
+@profile_router.get("/collapsed", response_class=PlainTextResponse)
+async def download_all_profiles():
+    """All buffered profiles merged into one collapsed-stack file."""
+    return render_collapsed(profiles.merged())
+
+@profile_router.get("/{profile_id}", response_class=PlainTextResponse)
+async def download_profile(profile_id: str):
+    stacks = profiles.get(profile_id)
+    if stacks is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return render_collapsed(stacks)
+
+@profile_router.delete("/")
+async def clear_profiles():
+    profiles.clear()
+    return {"message": "Profiles cleared"}
+
+
+def install_profiling(app: FastAPI):
+    """Add the profiling middleware and admin endpoints when PROFILING_ENABLED is set."""
+    if not PROFILING_ENABLED:
+        return
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(profile_router)